@@ -0,0 +1,25 @@
+import hashlib
+import math
+from array import array
+
+class BloomFilter:
+    def __init__(self, n, fpr=0.01):
+        n = max(n, 1)
+        # Optimal bit count and number of hash functions for n keys at the given false-positive rate
+        self.size = max(64, int(-n * math.log(fpr) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.size / n * math.log(2)))
+        self.bits = array('Q', bytes(8 * ((self.size + 63) // 64)))
+    
+    def _positions(self, key):
+        # Double hashing: derive all bit positions from the two halves of one MD5 digest
+        digest = hashlib.md5(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.num_hashes)]
+    
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 6] |= 1 << (pos & 63)
+    
+    def __contains__(self, key):
+        return all(self.bits[pos >> 6] >> (pos & 63) & 1 for pos in self._positions(key))
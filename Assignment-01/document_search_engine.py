@@ -4,18 +4,175 @@
 # and then search for keywords or phrases, with the results ranked based on the frequency of
 # query terms in the documents. It also includes a simple command-line interface for user interaction.
 
+import io
+import mmap
 import os
+import re
+import sys
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, repeat
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from simple_dictionary import SimpleDictionary
 
-# Load English stopwords to filter out common words like "the", "and", etc.
-stop_words = set(stopwords.words('english'))
+@lru_cache(maxsize=1)
+def _get_lemmatizer():
+    """
+    Initialize the lemmatizer for word normalization on first use only.
+    """
+    return WordNetLemmatizer()
+
+@lru_cache(maxsize=1)
+def _get_stopwords():
+    """
+    Load English stopwords to filter out common words like "the", "and", etc. on first use only.
+    The lemmas of stopwords are included too, so one membership test rejects them before lemmatizing.
+    """
+    stop_words = set(stopwords.words('english'))
+    stop_words |= {_get_lemmatizer().lemmatize(word) for word in stop_words}
+    return frozenset(stop_words)
+
+@lru_cache(maxsize=200_000)
+def _lemma(word):
+    """
+    Lemmatize a single word, memoizing the result since the same tokens recur across documents.
+    The lemma is interned so equal nouns share one string object and compare by identity.
+    """
+    return sys.intern(_get_lemmatizer().lemmatize(word))
+
+# Maximum number of ranked documents returned by a search
+TOP_K = 50
+
+# Number of recent query results each search engine keeps cached
+QUERY_CACHE_SIZE = 1024
+
+# Number of documents a worker reads and scans per batch while indexing
+INDEX_BATCH_SIZE = 64
+
+# Suffixes that commonly mark English nouns
+noun_suffixes = (
+    "ion", "ment", "ness", "ity", "ty", "ance", "ence", "ure", "ship", "hood",
+    "er", "or", "ist", "al", "age", "cy", "dom"
+)
+
+def _trie_pattern(words):
+    """
+    Build a regex alternation matching any of the given words, factored as a trie
+    so the regex engine branches on one character at a time instead of trying every word.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Marks the end of a word
+
+    def to_pattern(node):
+        branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:  # A word may also end here
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return to_pattern(trie)
+
+# Lowercase noun candidates: a noun suffix, optionally pluralized ("computers"), or an "-ies" plural ("cities").
+# The suffix is confirmed on the lemma afterwards, see _noun_lemma.
+_SUFFIX_NOUN_PATTERN = r'[a-z]+(?:' + _trie_pattern(noun_suffixes) + r'(?:e?s)?|ies)'
+
+# Match capitalized words (proper nouns) or lowercase noun candidates in a single scan
+_NOUN_RE = re.compile(r'\b([A-Z][A-Za-z]*|' + _SUFFIX_NOUN_PATTERN + r')\b')
+
+# Word tokens of titles and queries
+_TOKEN_RE = re.compile(r'\w+')
+
+# Same scan over a byte buffer holding a batch of memory-mapped contents, which also captures the
+# \x00<doc_id>\x00 sentinels between documents. Non-ASCII (UTF-8) bytes count as word characters,
+# so accented words are not split the way a plain bytes \b would split them.
+_BATCH_NOUN_RE = re.compile(
+    rb'\x00(\d+)\x00|(?<![\w\x80-\xff])([A-Z][A-Za-z]*|'
+    + _SUFFIX_NOUN_PATTERN.encode() + rb')(?![\w\x80-\xff])'
+)
+
+def _noun_lemma(word):
+    """
+    Lemmatize a noun candidate matched by the noun regex. Lowercase candidates only count as nouns
+    when their lemma ends in a noun suffix, so plurals are judged by their singular form.
+    Returns None for rejected candidates.
+    """
+    lemma = _lemma(word.lower())
+    if word[0].isupper() or lemma.endswith(noun_suffixes):
+        return lemma
+    return None
+
+def _rank(posting_lists, top_k=TOP_K):
+    """
+    Merge the given (doc_ids, term_frequencies) posting lists and rank the document IDs they contain.
+    Each posting adds its term frequency to the document's score; returns the top_k (doc_id, score)
+    pairs ordered by descending score (all of them if top_k is None).
+    """
+    # Expand each posting into its doc ID repeated term-frequency times and count them all in C
+    occurrences = chain.from_iterable(map(repeat, doc_ids, counts) for doc_ids, counts in posting_lists)
+    doc_scores = Counter(chain.from_iterable(occurrences))
+    # most_common(k) selects with a heap in O(n log k) instead of sorting every score
+    return doc_scores.most_common(top_k)
+
+def _map_document(path, buffer):
+    """
+    Memory-map a document file and return its title (first line) and a 200-character content preview.
+    The content bytes (the rest of the file) are copied straight from the mapping into buffer,
+    without ever being decoded as a whole.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # Empty files cannot be mapped
+            return "", ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            newline = mm.find(b'\n')
+            if newline == -1:  # Title only
+                return mm[:].decode('utf-8').strip(), ""
+            title = mm[:newline].decode('utf-8').strip()
+            # 800 bytes hold at least 200 UTF-8 characters; a character cut at the end is dropped
+            preview = mm[newline + 1:newline + 801].decode('utf-8', errors='ignore').strip()[:200]
+            with memoryview(mm) as view:
+                buffer.write(view[newline + 1:])
+    return title, preview
 
-# Initialize lemmatizer for word normalization
-lemmatizer = WordNetLemmatizer()
+def _process_batch(batch):
+    """
+    Read a batch of (doc_id, path) documents and extract the nouns of their titles and contents.
+    The contents are joined into one buffer separated by doc-ID sentinels, so the noun regex
+    scans the whole batch in a single pass.
+    Runs in a worker process, so it only returns data and never touches the indexes.
+    """
+    results = []
+    buffer = io.BytesIO()
+    for doc_id, path in batch:
+        buffer.write(b'\x00%d\x00 ' % doc_id)
+        title, preview = _map_document(path, buffer)
+        buffer.write(b' ')
+        title_nouns = DocumentSearchEngine.extract_nouns(title, isTitle=True)
+        content_nouns = []
+        # Only the preview of the content is kept for the results
+        results.append((doc_id, title, preview, title_nouns, content_nouns))
+
+    # Route each noun to the content noun list of the document whose sentinel precedes it
+    nouns_by_doc = {result[0]: result[4] for result in results}
+    current_nouns = None
+    with buffer.getbuffer() as data:
+        for match in _BATCH_NOUN_RE.finditer(data):
+            if match.group(1) is not None:
+                current_nouns = nouns_by_doc[int(match.group(1))]
+            else:
+                lemma = _noun_lemma(match.group(2).decode('ascii'))
+                if lemma is not None:
+                    current_nouns.append(lemma)
+    return results
 
 class DocumentSearchEngine:
     def __init__(self, folder_path):
@@ -24,35 +181,33 @@ class DocumentSearchEngine:
         - folder_path: Path to the folder containing documents to index.
         """
         self.folder_path = folder_path
-        # Using SimpleDictionary to store inverted indexes for title and content
+        # Using SimpleDictionary to store inverted indexes (int32 doc ID and term frequency arrays) for title and content
         self.title_index = SimpleDictionary()
         self.content_index = SimpleDictionary()
-        # Store documents in a dictionary with their ID as key
-        self.documents = {}
+        # Searchers specialized for each index; they see documents as they are indexed
+        self._search_title = self._make_searcher(self.title_index)
+        self._search_content = self._make_searcher(self.content_index)
+        # Cache of recent query results, cleared whenever the indexes change
+        self._cached_search = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._search_uncached)
+        # Store documents in a list indexed by their ID (IDs are assigned densely from 0)
+        self.documents = []
 
-    def extract_nouns(self, text, isTitle):
+    @staticmethod
+    def extract_nouns(text, isTitle):
         """
         Extract nouns from the given text using heuristic rules.
         Lemmatize the words before indexing.
         Nouns are identified by specific suffixes or capitalized letters (proper nouns).
         """
-        words = text.split()  # Split text into individual words
-        noun_suffixes = (
-            "ion", "ment", "ness", "ity", "ty", "ance", "ence", "ure", "ship", "hood", 
-            "er", "or", "ist", "al", "age", "cy", "dom"
-        )
-        nouns = []
-        
-        for word in words:
-            word = lemmatizer.lemmatize(word.lower())  # Lemmatize to normalize words
-            # Check if the word is capitalized (proper noun) or ends with known noun suffix
-            if isTitle:
-                nouns.append(word)
-            else:
-                if word[0].isupper() or word.endswith(noun_suffixes):
-                    nouns.append(word)
-        
-        return nouns
+        if isTitle:
+            # Every title word except stopwords is indexed (queries never contain stopwords).
+            # Lowercase once, then lemmatize to normalize words.
+            stop_words = _get_stopwords()
+            return [_lemma(word) for word in _TOKEN_RE.findall(text.lower()) if word not in stop_words]
+
+        # Let the compiled regex pick out candidate nouns, then lemmatize only the hits
+        lemmas = map(_noun_lemma, _NOUN_RE.findall(text))
+        return [lemma for lemma in lemmas if lemma is not None]
 
     def load_and_index_documents(self):
         """
@@ -60,21 +215,28 @@ class DocumentSearchEngine:
         from both titles and content for fast searching.
         """
         print("Loading and indexing documents...")
-        doc_id = 0
-        # Iterate over each file in the folder and process it
-        for filename in os.listdir(self.folder_path):
-            file_path = os.path.join(self.folder_path, filename)
-            if os.path.isfile(file_path):  # Process only files
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    # Read title and content from the document
-                    title = file.readline().strip()
-                    content = file.read().strip()
-                    # Store the document in the dictionary with a unique ID
-                    self.documents[doc_id] = {"title": title, "content": content}
-                    # Index the document by extracting nouns from title and content
-                    self.index_document(doc_id, title, content)
-                    doc_id += 1
-        print(f"Loaded and indexed {doc_id} documents.")
+        # Warm up the WordNet corpus before the workers are forked, so they inherit it loaded
+        # and the first real query doesn't pay its load latency
+        _lemma("test")
+        # Collect the files in the folder (scandir gives file type without an extra stat)
+        paths = [entry.path for entry in os.scandir(self.folder_path) if entry.is_file()]
+        # Split the files into small batches of (doc_id, path) pairs; the executor hands them out
+        # as workers free up, and only the batches in flight are buffered in memory
+        numbered = list(enumerate(paths))
+        batches = [numbered[i:i + INDEX_BATCH_SIZE] for i in range(0, len(numbered), INDEX_BATCH_SIZE)]
+        # Read and extract nouns from the batches in parallel, then merge into the indexes here.
+        # map() yields results in submission order, so posting lists stay sorted by doc ID.
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for results in executor.map(_process_batch, batches):
+                for doc_id, title, preview, title_nouns, content_nouns in results:
+                    # Store the document at its ID, with the 1-based ID shown to the user precomputed
+                    self.documents.append({"title": title, "preview": preview, "display_id": doc_id + 1})
+                    # Index the extracted nouns from title and content
+                    self.add_postings(doc_id, title_nouns, content_nouns)
+        # Let searches reject query words missing from an index without scanning its buckets
+        self.title_index.build_bloom_filter()
+        self.content_index.build_bloom_filter()
+        print(f"Loaded and indexed {len(paths)} documents.")
 
     def index_document(self, doc_id, title, content):
         """
@@ -83,44 +245,63 @@ class DocumentSearchEngine:
         """
         title_nouns = self.extract_nouns(title, isTitle=True)  # Extract nouns from the title
         content_nouns = self.extract_nouns(content, isTitle=False)  # Extract nouns from the content
-        
+        self.add_postings(doc_id, title_nouns, content_nouns)
+
+    def add_postings(self, doc_id, title_nouns, content_nouns):
+        """
+        Add the already extracted title and content nouns of a document to the inverted indexes.
+        Nouns coming back from worker processes are re-interned here, since interning is per process.
+        """
         # Add the nouns from the title to the title index
-        for noun in title_nouns:
-            self.title_index.add(noun, doc_id)
+        self.title_index.add_many(map(sys.intern, title_nouns), doc_id)
         
         # Add the nouns from the content to the content index
-        for noun in content_nouns:
-            self.content_index.add(noun, doc_id)
+        self.content_index.add_many(map(sys.intern, content_nouns), doc_id)
 
-    def search(self, query, search_by):
+        # Cached query results may no longer be accurate
+        self._cached_search.cache_clear()
+
+    @staticmethod
+    def _make_searcher(index):
+        """
+        Build a search function specialized for one index, so the title/content choice
+        is made once instead of on every query.
+        """
+        get_postings = index.get_postings
+
+        def search_index(query, top_k=TOP_K):
+            # Preprocess the query by converting to lowercase, removing stopwords, and lemmatizing
+            stop_words = _get_stopwords()
+            query_words = [_lemma(word) for word in _TOKEN_RE.findall(query.lower()) if word not in stop_words]
+
+            if not query_words:  # If query is empty or contains only stopwords
+                return []
+
+            # Merge the posting lists of all query words and rank documents by how often they occur
+            ranked_docs = _rank((get_postings(word) for word in query_words), top_k)
+
+            # Return the document IDs ordered by their relevance (higher score means more relevant)
+            return [doc_id for doc_id, score in ranked_docs]
+
+        return search_index
+
+    def search(self, query, search_by, top_k=TOP_K):
         """
         Search the indexed documents for the query terms and rank results based on frequency.
         The search can be performed either on the title or content based on the user's choice.
+        Only the top_k most relevant documents are returned (all of them if top_k is None).
+        Repeated queries are answered from a cache of recent results.
         """
-        # Preprocess the query by converting to lowercase, removing stopwords, and lemmatizing
-        query_words = query.lower().split()
-        query_words = [lemmatizer.lemmatize(word) for word in query_words if word not in stop_words]
-        
-        if not query_words:  # If query is empty or contains only stopwords
-            return []
-
-        # Choose the correct index based on the search type (title or content)
-        index = self.title_index if search_by == "title" else self.content_index
-        doc_scores = {}
-
-        # For each query word, check which documents contain it and increment their score
-        for word in query_words:
-            doc_ids = index.get(word)  # Get the document IDs that contain the word
-            for doc_id in doc_ids:
-                if doc_id not in doc_scores:
-                    doc_scores[doc_id] = 0
-                doc_scores[doc_id] += 1  # Increment score for each occurrence of the word
-
-        # Rank the documents by their scores (higher score means more relevant)
-        ranked_docs = sorted(doc_scores.items(), key=lambda item: item[1], reverse=True)
-        
-        # Return the document IDs ordered by their relevance
-        return [doc_id for doc_id, score in ranked_docs]
+        # The query is lowercased during preprocessing anyway, so case variants share a cache entry
+        return list(self._cached_search(query.lower(), search_by, top_k))
+
+    def _search_uncached(self, query, search_by, top_k):
+        """
+        Run a search without the result cache, returning the document IDs as a tuple so cached results can't be modified.
+        """
+        # Dispatch to the searcher specialized for the chosen index (title or content)
+        searcher = self._search_title if search_by == "title" else self._search_content
+        return tuple(searcher(query, top_k))
 
     def display_results(self, doc_ids, search_by, query_time):
         """
@@ -136,16 +317,16 @@ class DocumentSearchEngine:
         else:
             # Display information for each document
             for i, doc_id in enumerate(doc_ids, start=1):
-                title = self.documents[doc_id]["title"]
-                content_snippet = self.documents[doc_id]["content"][:200]  # Preview first 200 characters of content
+                doc = self.documents[doc_id]
                 print(f"\nResult {i}:")
                 print("-" * 50)
-                print(f"Document ID: {doc_id+1}")
-                print(f"Title: {title}")
+                print(f"Document ID: {doc['display_id']}")
+                print(f"Title: {doc['title']}")
                 if search_by == "content":
-                    print(f"Content Preview: {content_snippet}...")
+                    print(f"Content Preview: {doc['preview']}...")  # First 200 characters of content
                 print("-" * 50)
-            print(f"\nTotal Results Found: {len(doc_ids)}")
+            # Searches return at most TOP_K documents, so this is not the total number of matches
+            print(f"\nShowing top {len(doc_ids)} results")
 
 def run_ui(search_engine):
     """
@@ -1,25 +1,51 @@
+from array import array
+from collections import Counter
+from bloom_filter import BloomFilter
+
 class SimpleDictionary:
     def __init__(self, size=100):
         self.size = size
         self.buckets = [[] for _ in range(size)]
+        self.bloom = None  # Optional filter that rejects missing keys without a bucket scan
     
     def _hash(self, key):
         return hash(key) % self.size
     
-    def add(self, key, value):
+    def add(self, key, value, count=1):
         index = self._hash(key)
-        for i, (k, v) in enumerate(self.buckets[index]):
+        for k, (values, counts) in self.buckets[index]:
             if k == key:
-                self.buckets[index][i] = (key, v + [value])  # Append new doc ID
+                # Append new doc ID and its term frequency in place
+                values.append(value)
+                counts.append(count)
                 return
-        self.buckets[index].append((key, [value]))  # Insert new key-value pair
+        # Insert new key with compact int32 arrays of doc IDs and term frequencies
+        self.buckets[index].append((key, (array('i', [value]), array('i', [count]))))
+        if self.bloom is not None:
+            self.bloom.add(key)
     
-    def get(self, key):
+    def add_many(self, keys, value):
+        # One posting per distinct key, carrying how often the key occurred
+        for key, count in Counter(keys).items():
+            self.add(key, value, count)
+    
+    def build_bloom_filter(self, fpr=0.01):
+        keys = [k for bucket in self.buckets for k, _ in bucket]
+        self.bloom = BloomFilter(len(keys), fpr)
+        for key in keys:
+            self.bloom.add(key)
+    
+    def get_postings(self, key):
+        if self.bloom is not None and key not in self.bloom:
+            return array('i'), array('i')
         index = self._hash(key)
-        for k, v in self.buckets[index]:
+        for k, postings in self.buckets[index]:
             if k == key:
-                return v
-        return []
+                return postings
+        return array('i'), array('i')
+    
+    def get(self, key):
+        return self.get_postings(key)[0]
     
     def delete(self, key):
         index = self._hash(key)
@@ -30,5 +56,5 @@ class SimpleDictionary:
     
     def __repr__(self):
         return "{ " + ", ".join(
-            f"{k}: {v}" for bucket in self.buckets for k, v in bucket
+            f"{k}: {list(zip(*v))}" for bucket in self.buckets for k, v in bucket
         ) + " }"
\ No newline at end of file
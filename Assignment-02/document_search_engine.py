@@ -1,4 +1,12 @@
+import mmap
 import os
+import string
+import sys
+from collections import Counter
+from functools import lru_cache
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
@@ -7,62 +15,103 @@ from nltk.stem import WordNetLemmatizer
 nltk.download('stopwords')
 nltk.download('wordnet')
 
-stop_words = set(stopwords.words('english'))
+# Stopwords never change after loading, so keep them in an immutable frozenset
+stop_words = frozenset(stopwords.words('english'))
 lemmatizer = WordNetLemmatizer()
 
+# Translation table mapping punctuation to spaces, so "fox)" and "fox" become the same term
+_PUNCTUATION_TO_SPACE = str.maketrans({char: ' ' for char in string.punctuation})
+
+# Terms found in more than this fraction of the documents are dropped as implicit stopwords.
+# In small collections almost every term exceeds the ratio, so the cutoff only applies from
+# MIN_DOCUMENTS_FOR_DF_CUTOFF documents on.
+MAX_DF_RATIO = 0.2
+MIN_DOCUMENTS_FOR_DF_CUTOFF = 50
+
+@lru_cache(maxsize=200_000)
+def _lemmatize(word):
+    """
+    Lemmatize a single word, memoizing the result since the same words recur across documents.
+    The lemma is interned so repeated terms share one string object.
+    """
+    return sys.intern(lemmatizer.lemmatize(word))
+
 # Define preprocessing functions
 def preprocess(text):
     """
-    Preprocess text by tokenizing, lemmatizing, and removing stopwords.
+    Preprocess text by stripping punctuation, tokenizing, lemmatizing, and removing stopwords.
+    Very short words and numbers have no other lemma, so they skip the lemmatizer.
     """
-    words = text.lower().split()
-    return [lemmatizer.lemmatize(word) for word in words if word not in stop_words]
+    words = text.translate(_PUNCTUATION_TO_SPACE).lower().split()
+    return [word if len(word) <= 2 or word.isdigit() else _lemmatize(word)
+            for word in words if word not in stop_words]
+
+# Find terms too common to help ranking
+def find_common_terms(doc_terms):
+    """
+    Return the terms that appear in more than MAX_DF_RATIO of the documents, given each document's set of terms.
+    """
+    if len(doc_terms) < MIN_DOCUMENTS_FOR_DF_CUTOFF:
+        return set()
+    document_frequency = Counter(chain.from_iterable(doc_terms))
+    common_terms = {term for term, df in document_frequency.items() if df > MAX_DF_RATIO * len(doc_terms)}
+    if common_terms:
+        print(f"Dropped {len(common_terms)} common terms: {', '.join(sorted(common_terms))}")
+    return common_terms
 
 # Create a binary term-document matrix
 def create_term_document_matrix(documents):
     """
     Create a term-document matrix where each term is assigned a binary weight (1 if present, 0 if absent).
+    Each document row is stored sparsely as the set of its terms with weight 1, so scoring only
+    touches the terms a document actually contains instead of the whole vocabulary.
+    Terms found in too many documents (see MAX_DF_RATIO) are left out of the matrix.
     """
-    vocabulary = set()
-    for doc in documents:
-        vocabulary.update(preprocess(doc))
-    
-    vocabulary = sorted(vocabulary)
-    term_index = {term: idx for idx, term in enumerate(vocabulary)}
-
-    matrix = [[0] * len(vocabulary) for _ in range(len(documents))]
-
-    for doc_idx, doc in enumerate(documents):
-        terms = preprocess(doc)
-        for term in terms:
-            matrix[doc_idx][term_index[term]] = 1
-
+    matrix = [set(preprocess(doc)) for doc in documents]
+    common_terms = find_common_terms(matrix)
+    if common_terms:
+        matrix = [terms - common_terms for terms in matrix]
+    vocabulary = set().union(*matrix)
     return matrix, vocabulary
 
 # Represent query as a binary vector
 def query_vector(query, vocabulary):
     """
-    Represent the query as a binary vector based on the vocabulary.
+    Represent the query as a sparse binary vector: the set of its terms found in the vocabulary.
     """
-    query_terms = preprocess(query)
-    return [1 if term in query_terms else 0 for term in vocabulary]
+    return set(preprocess(query)) & vocabulary
 
 # Compute similarity score (Jaccard coefficient)
 def compute_similarity(doc_vector, query_vector):
     """
     Compute similarity using Jaccard coefficient.
     """
-    intersection = sum(1 for d, q in zip(doc_vector, query_vector) if d == q == 1)
-    union = sum(1 for d, q in zip(doc_vector, query_vector) if d == 1 or q == 1)
+    intersection = len(doc_vector & query_vector)
+    union = len(doc_vector) + len(query_vector) - intersection
     return intersection / union if union > 0 else 0
 
 # Rank documents based on similarity scores
-def rank_documents(term_document_matrix, query_vec):
+def rank_documents(term_document_matrix, query_vec, top_k=None):
     """
     Rank documents based on similarity scores.
+    When top_k is given, only the top_k documents are selected, using a heap instead of a full sort.
     """
     scores = [(idx, compute_similarity(doc, query_vec)) for idx, doc in enumerate(term_document_matrix)]
-    return sorted(scores, key=lambda x: x[1], reverse=True)
+    if top_k is not None:
+        return nlargest(top_k, scores, key=itemgetter(1))
+    return sorted(scores, key=itemgetter(1), reverse=True)
+
+# Read one document file through a read-only memory map
+def _read_document(path):
+    """
+    Return the stripped text of a document file. The file is memory-mapped and decoded
+    straight from the page cache instead of going through a buffered text reader.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # Empty files cannot be mapped
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8').strip()
 
 # Load documents from a folder
 def load_documents(folder_path):
@@ -70,23 +119,21 @@ def load_documents(folder_path):
     Load documents from the folder and return a list of their contents.
     """
     documents = []
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if os.path.isfile(file_path):
-            with open(file_path, 'r', encoding='utf-8') as file:
-                documents.append(file.read().strip())
+    # scandir reports the file type with each entry, avoiding a stat call per file
+    for entry in os.scandir(folder_path):
+        if entry.is_file():
+            documents.append(_read_document(entry.path))
     print(f"Loaded {len(documents)} documents.")
     return documents
 
 # Main BIM retrieval function
-def bim_retrieval(documents, query, top_k=5):
+def bim_retrieval(documents, query, term_document_matrix, vocabulary, top_k=5):
     """
     Perform Binary Independence Model (BIM) retrieval.
+    The term-document matrix and vocabulary are built once with create_term_document_matrix.
     """
-    term_document_matrix, vocabulary = create_term_document_matrix(documents)
     query_vec = query_vector(query, vocabulary)
-    ranked_docs = rank_documents(term_document_matrix, query_vec)
-    top_documents = ranked_docs[:top_k]
+    top_documents = rank_documents(term_document_matrix, query_vec, top_k)
     return [(documents[idx], score) for idx, score in top_documents]
 
 # CLI Interface
@@ -95,6 +142,9 @@ def main():
     folder_path = "path/to/documents"  # Set the folder path here
     documents = load_documents(folder_path)
 
+    # Build the term-document matrix once, so documents are not re-tokenized on every query
+    term_document_matrix, vocabulary = create_term_document_matrix(documents)
+
     while True:
         print("\n---- BIM Retrieval System ----")
         print("1. Perform search query")
@@ -106,7 +156,7 @@ def main():
             # Perform search query
             query = input("Enter your search query: ").strip()
             top_k = int(input("Enter the number of top results to display (default 5): ").strip() or 5)
-            results = bim_retrieval(documents, query, top_k)
+            results = bim_retrieval(documents, query, term_document_matrix, vocabulary, top_k)
             print("\nTop results:")
             for rank, (doc, score) in enumerate(results, start=1):
                 print(f"{rank}. Score: {score:.3f} - Document: {doc}")
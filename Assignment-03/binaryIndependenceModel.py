@@ -1,90 +1,150 @@
+import mmap
 import os
+import string
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
-stop_words = set(stopwords.words('english'))
+stop_words = frozenset(stopwords.words('english'))
 lemmatizer = WordNetLemmatizer()
 
+# Maps punctuation to spaces
+_PUNCTUATION_TO_SPACE = str.maketrans({char: ' ' for char in string.punctuation})
+
+# Terms found in more than this fraction of the documents are dropped as implicit stopwords.
+# In small collections almost every term exceeds the ratio, so the cutoff only applies from
+# MIN_DOCUMENTS_FOR_DF_CUTOFF documents on.
+MAX_DF_RATIO = 0.2
+MIN_DOCUMENTS_FOR_DF_CUTOFF = 50
+
+@lru_cache(maxsize=200_000)
+def _lemmatize(word):
+    """
+    Lemmatize a single word, memoizing the result since the same words recur across documents.
+    """
+    return lemmatizer.lemmatize(word)
+
 # Define preprocessing functions
 def preprocess(text):
     """
-    Preprocess text by tokenizing, lemmatizing, and removing stopwords.
+    Preprocess text by stripping punctuation, tokenizing, lemmatizing, and removing stopwords.
+    Very short words and numbers have no other lemma, so they skip the lemmatizer.
+    """
+    words = text.translate(_PUNCTUATION_TO_SPACE).lower().split()
+    return [word if len(word) <= 2 or word.isdigit() else _lemmatize(word)
+            for word in words if word not in stop_words]
+
+# Pack a set of bit positions into a single integer bitset
+def pack_bits(indices, size):
+    """
+    Pack the given bit positions into an integer of `size` bits (bit i set for each index i).
+    Bits are set in a bytearray and converted once, so the cost is linear in the row size.
     """
-    words = text.lower().split()
-    return [lemmatizer.lemmatize(word) for word in words if word not in stop_words]
+    bits = bytearray((size + 7) // 8)
+    for idx in indices:
+        bits[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(bits, 'little')
+
+# Find terms too common to help ranking
+def find_common_terms(doc_terms):
+    """
+    Return the terms that appear in more than MAX_DF_RATIO of the documents, given each document's set of terms.
+    """
+    if len(doc_terms) < MIN_DOCUMENTS_FOR_DF_CUTOFF:
+        return set()
+    document_frequency = Counter(chain.from_iterable(doc_terms))
+    common_terms = {term for term, df in document_frequency.items() if df > MAX_DF_RATIO * len(doc_terms)}
+    if common_terms:
+        print(f"Dropped {len(common_terms)} common terms: {', '.join(sorted(common_terms))}")
+    return common_terms
 
 # Create a binary term-document matrix
 def create_term_document_matrix(documents):
     """
     Create a term-document matrix where each term is assigned a binary weight (1 if present, 0 if absent).
+    Each document row is bit-packed into one integer (bit i set when vocabulary term i is present),
+    so similarity is computed with bitwise AND and popcount instead of Python loops over the vocabulary.
+    The vocabulary is returned as a mapping from each term (in sorted order) to its bit position.
+    Terms found in too many documents (see MAX_DF_RATIO) get no column.
+    The number of terms in each document (its row sum) is returned as well, so queries don't recount it.
     """
-    vocabulary = set()
-    for doc in documents:
-        vocabulary.update(preprocess(doc))
-    
-    vocabulary = sorted(vocabulary)
-    term_index = {term: idx for idx, term in enumerate(vocabulary)}
-
-    matrix = [[0] * len(vocabulary) for _ in range(len(documents))]
+    doc_terms = [set(preprocess(doc)) for doc in documents]
+    common_terms = find_common_terms(doc_terms)
+    vocabulary = {term: idx for idx, term in enumerate(sorted(set().union(*doc_terms) - common_terms))}
 
-    for doc_idx, doc in enumerate(documents):
-        terms = preprocess(doc)
-        for term in terms:
-            matrix[doc_idx][term_index[term]] = 1
+    matrix = [pack_bits((vocabulary[term] for term in terms if term in vocabulary), len(vocabulary))
+              for terms in doc_terms]
+    doc_sums = [row.bit_count() for row in matrix]
 
-    return matrix, vocabulary
+    return matrix, vocabulary, doc_sums
 
 # Represent query as a binary vector
 def query_vector(query, vocabulary):
     """
-    Represent the query as a binary vector based on the vocabulary.
+    Represent the query as a bit-packed binary vector based on the vocabulary.
     """
     query_terms = preprocess(query)
-    return [1 if term in query_terms else 0 for term in vocabulary]
+    return pack_bits((vocabulary[term] for term in query_terms if term in vocabulary), len(vocabulary))
 
 # Compute similarity score (Dice coefficient)
-def compute_similarity(doc_vector, query_vector):
+def compute_similarity(doc_vector, query_vector, query_sum=None, doc_sum=None):
     """
     Compute similarity using Dice coefficient.
+    query_sum and doc_sum (the number of query and document terms) can be passed in when already known.
     """
-    intersection = sum(1 for d, q in zip(doc_vector, query_vector) if d == q == 1)
-    doc_sum = sum(doc_vector)
-    query_sum = sum(query_vector)
+    intersection = (doc_vector & query_vector).bit_count()
+    if doc_sum is None:
+        doc_sum = doc_vector.bit_count()
+    if query_sum is None:
+        query_sum = query_vector.bit_count()
     dice_score = (2 * intersection) / (doc_sum + query_sum) if (doc_sum + query_sum) > 0 else 0
-    print(f"Intersection: {intersection}, Document sum: {doc_sum}, Query sum: {query_sum}, Dice score: {dice_score}")  # Debug
     return dice_score
 
 # Rank documents based on similarity scores
-def rank_documents(term_document_matrix, query_vec):
+def rank_documents(term_document_matrix, doc_sums, query_vec):
     """
     Rank documents based on similarity scores.
     """
-    scores = [(idx, compute_similarity(doc, query_vec)) for idx, doc in enumerate(term_document_matrix)]
+    # The query's term count is the same for every document, so count it once
+    query_sum = query_vec.bit_count()
+    scores = [(idx, compute_similarity(doc, query_vec, query_sum, doc_sum))
+              for idx, (doc, doc_sum) in enumerate(zip(term_document_matrix, doc_sums))]
     return sorted(scores, key=lambda x: x[1], reverse=True)
 
+# Read one document file
+def _read_document(path):
+    """
+    Return the stripped text of a document file, read through a memory map.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # Empty files cannot be mapped
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8').strip()
+
 # Load documents from a folder
 def load_documents(folder_path):
     """
     Load documents from the folder and return a list of their contents.
     """
     documents = []
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if os.path.isfile(file_path):
-            with open(file_path, 'r', encoding='utf-8') as file:
-                documents.append(file.read().strip())
+    for entry in os.scandir(folder_path):
+        if entry.is_file():
+            documents.append(_read_document(entry.path))
     print(f"Loaded {len(documents)} documents.")
     return documents
 
 # Main BIM retrieval function
-def bim_retrieval(documents, query):
+def bim_retrieval(documents, query, term_document_matrix, vocabulary, doc_sums):
     """
     Perform Binary Independence Model (BIM) retrieval.
+    The term-document matrix, vocabulary and document sums are built once with create_term_document_matrix.
     """
-    term_document_matrix, vocabulary = create_term_document_matrix(documents)
     query_vec = query_vector(query, vocabulary)
-    ranked_docs = rank_documents(term_document_matrix, query_vec)
+    ranked_docs = rank_documents(term_document_matrix, doc_sums, query_vec)
     return [(documents[idx], score) for idx, score in ranked_docs]
 
 # CLI Interface
@@ -93,6 +153,9 @@ def main():
     folder_path = "documents/"  # Set the folder path here
     documents = load_documents(folder_path)
 
+    # Build the term-document matrix once, so documents are not re-tokenized on every query
+    term_document_matrix, vocabulary, doc_sums = create_term_document_matrix(documents)
+
     while True:
         print("\n---- BIM Retrieval System ----")
         print("1. Perform search query")
@@ -104,7 +167,7 @@ def main():
             # Perform search query
             query = input("Enter your search query: ").strip()
             # top_k = int(input("Enter the number of top results to display (default 5): ").strip() or 5)
-            results = bim_retrieval(documents, query)
+            results = bim_retrieval(documents, query, term_document_matrix, vocabulary, doc_sums)
             print("\nTop results:")
             for rank, (doc, score) in enumerate(results, start=1):
                 print(f"{rank}. Score: {score:.3f} - Document: {doc}")
@@ -1,68 +1,93 @@
+import mmap
 import os
+import string
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
-stop_words = set(stopwords.words('english'))
+stop_words = frozenset(stopwords.words('english'))
 lemmatizer = WordNetLemmatizer()
 
+# Maps punctuation to spaces
+_PUNCTUATION_TO_SPACE = str.maketrans({char: ' ' for char in string.punctuation})
+
+@lru_cache(maxsize=200_000)
+def _lemmatize(word):
+    """
+    Lemmatize a single word, memoizing the result since the same words recur across documents.
+    """
+    return lemmatizer.lemmatize(word)
+
 # Define preprocessing functions
 def preprocess(text):
     """
-    Preprocess text by tokenizing, lemmatizing, and removing stopwords.
+    Preprocess text by stripping punctuation, tokenizing, lemmatizing, and removing stopwords.
+    Very short words and numbers have no other lemma, so they skip the lemmatizer.
     """
-    words = text.lower().split()
-    return [lemmatizer.lemmatize(word) for word in words if word not in stop_words]
+    words = text.translate(_PUNCTUATION_TO_SPACE).lower().split()
+    return [word if len(word) <= 2 or word.isdigit() else _lemmatize(word)
+            for word in words if word not in stop_words]
+
+# Extract the distinct terms of one document
+def _document_terms(text):
+    """
+    Return the set of preprocessed terms in a document. Runs in a worker process.
+    """
+    return set(preprocess(text))
 
 # Create an inverted index
 def create_inverted_index(documents):
     """
-    Create an inverted index mapping terms to the list of documents they appear in.
+    Create an inverted index mapping terms to the documents they appear in.
+    Each posting list is a compact array of unsigned ints, sorted by document ID.
+    Documents are preprocessed in parallel worker processes; the postings are merged here.
     """
     inverted_index = {}
-    for doc_id, text in enumerate(documents):
-        terms = preprocess(text)
-        for term in terms:
-            if term not in inverted_index:
-                inverted_index[term] = []
-            if doc_id not in inverted_index[term]:
+    with ProcessPoolExecutor() as executor:
+        doc_terms = executor.map(_document_terms, documents, chunksize=32)
+        # Documents arrive in order and each one's terms are distinct,
+        # so appending keeps every posting list sorted and free of duplicates
+        for doc_id, terms in enumerate(doc_terms):
+            for term in terms:
+                if term not in inverted_index:
+                    inverted_index[term] = array('I')
                 inverted_index[term].append(doc_id)
     return inverted_index
 
 # Retrieve documents for a term
 def retrieve_documents(term, inverted_index):
     """
-    Retrieve the list of document IDs associated with a given term.
+    Retrieve the sorted document IDs associated with a given term.
     """
-    return inverted_index.get(term, [])
-
-# Perform union of two lists without duplicates
-def union_lists(list1, list2):
-    """
-    Combine two lists into a single list without duplicates.
-    """
-    result = list1[:]  # Make a copy of the first list
-    for item in list2:
-        if item not in result:
-            result.append(item)
-    return result
+    return inverted_index.get(term, ())
 
 # Non-Overlapped List Retrieval
-def non_overlapped_list_model(documents, terms_of_interest):
+def non_overlapped_list_model(documents, terms_of_interest, inverted_index):
     """
     Retrieve a non-overlapping list of documents for the given terms of interest.
+    The inverted index is built once with create_inverted_index.
     """
-    # Create an inverted index
-    inverted_index = create_inverted_index(documents)
-    
-    # Retrieve documents for each term
-    non_overlap_docs = []
+    # Retrieve documents for each term, merging them into a set so each document appears once
+    non_overlap_docs = set()
     for term in terms_of_interest:
-        term_docs = retrieve_documents(term, inverted_index)
-        non_overlap_docs = union_lists(non_overlap_docs, term_docs)
+        non_overlap_docs.update(retrieve_documents(term, inverted_index))
     
-    # Return the list of document IDs and their content
-    return [(doc_id, documents[doc_id]) for doc_id in non_overlap_docs]
+    # Return the list of document IDs (in ascending order) and their content
+    return [(doc_id, documents[doc_id]) for doc_id in sorted(non_overlap_docs)]
+
+# Read one document file
+def _read_document(path):
+    """
+    Return the stripped text of a document file, read through a memory map.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # Empty files cannot be mapped
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8').strip()
 
 # Load documents from a folder
 def load_documents(folder_path):
@@ -70,11 +95,9 @@ def load_documents(folder_path):
     Load documents from the folder and return a list of their contents.
     """
     documents = []
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if os.path.isfile(file_path):
-            with open(file_path, 'r', encoding='utf-8') as file:
-                documents.append(file.read().strip())
+    for entry in os.scandir(folder_path):
+        if entry.is_file():
+            documents.append(_read_document(entry.path))
     print(f"Loaded {len(documents)} documents.")
     return documents
 
@@ -84,6 +107,9 @@ def main():
     folder_path = "documents/"  # Set the folder path here
     documents = load_documents(folder_path)
 
+    # Build the inverted index once, so documents are not re-tokenized on every query
+    inverted_index = create_inverted_index(documents)
+
     while True:
         print("\n---- Non-Overlapping Document Retrieval ----")
         print("1. Perform search query")
@@ -95,7 +121,7 @@ def main():
             # Perform search query
             terms_input = input("Enter terms of interest (space-separated): ").strip()
             terms_of_interest = terms_input.split()  # Split by spaces into individual terms
-            results = non_overlapped_list_model(documents, terms_of_interest)
+            results = non_overlapped_list_model(documents, terms_of_interest, inverted_index)
             
             print("\nNon-overlapping results:")
             for rank, (doc_id, doc) in enumerate(results, start=1):
@@ -1,104 +1,174 @@
+import hashlib
 import os
 import json
-from itertools import combinations
+import pickle
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
+# Number of threads reading document files at once
+LOAD_THREADS = 16
+
+# Built indexes are pickled here, keyed by a signature of the document folder
+CACHE_DIR = "cache"
+
+# Part of the cache signature; bump it whenever preprocessing or the pickled layout changes
+CACHE_VERSION = 2
+
 # Preprocessing utilities
-stop_words = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
+# NLTK resources are loaded on first use, so importing this module (as every worker process does) stays cheap
+@lru_cache(maxsize=1)
+def _get_lemmatizer():
+    """
+    Initialize the lemmatizer on first use only.
+    """
+    return WordNetLemmatizer()
+
+@lru_cache(maxsize=1)
+def _get_stopwords():
+    """
+    Load the English stopwords on first use only.
+    """
+    return frozenset(stopwords.words('english'))
+
+# Runs of at least two letters; punctuation around a word no longer hides it
+_TOKEN_RE = re.compile(r"[a-z]{2,}")
+
+@lru_cache(maxsize=200_000)
+def _lemmatize(word):
+    """
+    Lemmatize a single word. Results are memoized, since a few thousand words make up most tokens.
+    """
+    return _get_lemmatizer().lemmatize(word)
 
 def preprocess(text):
     """
     Preprocess text by tokenizing, lemmatizing, and removing stopwords.
     """
-    words = text.lower().split()
-    return [lemmatizer.lemmatize(word) for word in words if word.isalnum() and word not in stop_words]
+    stop_words = _get_stopwords()
+    words = _TOKEN_RE.findall(text.lower())
+    return [_lemmatize(word) for word in words if word not in stop_words]
+
+# Load the NLTK resources in a worker process
+def _init_worker():
+    """
+    Load the stopwords and the WordNet corpus once when a worker starts, rather than inside its first task.
+    """
+    _get_stopwords()
+    _lemmatize("test")
+
+# Extract the distinct terms of one document
+def _document_terms(text):
+    """
+    Return the set of preprocessed terms in a document. Runs in a worker process.
+    """
+    # Each distinct term is linked once, however often it occurs in the document
+    return set(preprocess(text))
 
 # Build a graph of terms and documents
 def build_graph(documents):
     """
-    Build a graph connecting terms to documents and terms to terms within the same document.
-    """
-    graph = {}
-    
-    def add_node(node):
-        if node not in graph:
-            graph[node] = set()
-    
-    def add_edge(node1, node2):
-        add_node(node1)
-        add_node(node2)
-        graph[node1].add(node2)
-        graph[node2].add(node1)
-
-    for doc_id, doc_content in enumerate(documents):
-        terms = preprocess(doc_content)
-        document_node = f"doc_{doc_id}"
-        
-        # Link terms to document
-        for term in terms:
-            add_edge(term, document_node)
-        
-        # Link terms to other terms within the document
-        for term1, term2 in combinations(terms, 2):
-            add_edge(term1, term2)
-    
-    return graph
-
-def retrieve_documents(proximal_nodes, graph, documents):
-    """
-    Retrieve documents strongly connected to the given proximal nodes using BFS.
-    """
-    visited = set()
-    connected_documents = set()
-    queue = list(proximal_nodes)
-    
-    while queue:
-        current_node = queue.pop(0)
-        if current_node not in visited:
-            visited.add(current_node)
-            for neighbor in graph.get(current_node, []):
-                if neighbor.startswith("doc_"):  # Document node
-                    # Check if the document contains any of the proximal nodes
-                    doc_index = int(neighbor.split("_")[1])
-                    doc_content = documents[doc_index].lower()
-                    if any(term in doc_content for term in proximal_nodes):
-                        connected_documents.add(neighbor)
-                else:  # Continue exploring term nodes
-                    queue.append(neighbor)
-    
-    return connected_documents
+    Build the graph connecting terms to the documents they appear in, stored as postings:
+    each term maps to a sorted array of the IDs of its neighboring documents.
+    """
+    postings = {}
+
+    # A few chunks per worker keeps them all busy without paying for a round trip per document
+    chunksize = max(1, len(documents) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor(initializer=_init_worker) as executor:
+        doc_terms = executor.map(_document_terms, documents, chunksize=chunksize)
+        for doc_id, terms in enumerate(doc_terms):
+            # Link terms to document
+            for term in terms:
+                if term not in postings:
+                    postings[term] = array('I')
+                # Documents arrive in order, so appending keeps every posting list sorted
+                postings[term].append(doc_id)
+    return postings
+
+def retrieve_documents(proximal_nodes, postings):
+    """
+    Retrieve the sorted IDs of the documents connected to the given proximal nodes,
+    i.e. the union of their postings.
+    """
+    return sorted(set().union(*(postings.get(term, ()) for term in proximal_nodes)))
+
+# Load one JSON document
+def _load_document(path):
+    """
+    Return the text of a JSON document: the contents of its sections joined by spaces.
+    The file is read as bytes and parsed in one call, skipping the text-mode decoding layer.
+    """
+    with open(path, 'rb') as file:
+        data = json.loads(file.read())
+    return " ".join(section["content"] for section in data.get("sections", []))
 
 # Load documents from a folder
 def load_documents(folder_path):
     """
     Load documents from the folder and return a list of their contents.
+    Files are read on several threads, so one file's disk wait overlaps the parsing of others.
     """
-    documents = []
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if os.path.isfile(file_path) and filename.endswith('.json'):
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                documents.append(" ".join(section["content"] for section in data.get("sections", [])))
+    paths = [entry.path for entry in os.scandir(folder_path)
+             if entry.is_file() and entry.name.endswith('.json')]
+    # map returns the documents in the order of their paths, regardless of which thread finishes first
+    with ThreadPoolExecutor(max_workers=LOAD_THREADS) as executor:
+        documents = list(executor.map(_load_document, paths))
     print(f"Loaded {len(documents)} documents.")
     return documents
 
-# CLI Interface
-def main():
-    # Load documents
-    folder_path = "json_documents/"  # Set the folder path here
-    documents = load_documents(folder_path)
+# Fingerprint the document folder
+def _folder_signature(folder_path):
+    """
+    Hash CACHE_VERSION and the name, size and modification time of every JSON document in the folder.
+    """
+    digest = hashlib.md5(f"{CACHE_VERSION}\0".encode('utf-8'))
+    for entry in sorted(os.scandir(folder_path), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith('.json'):
+            stat = entry.stat()
+            digest.update(f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode('utf-8'))
+    return digest.hexdigest()
 
-    print(documents)
-    input()
+# Load the documents and their graph, from the cache when possible
+def load_index(folder_path):
+    """
+    Return the documents and the graph postings for the folder, from the cache
+    if the folder is unchanged since they were built.
+    """
+    cache_path = os.path.join(CACHE_DIR, f"{_folder_signature(folder_path)}.pkl")
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as file:
+                documents, postings = pickle.load(file)
+            print(f"Loaded {len(documents)} documents and their graph from {cache_path}.")
+            return documents, postings
+        except (EOFError, pickle.UnpicklingError):
+            print(f"Ignoring unreadable cache file {cache_path}.")
+
+    documents = load_documents(folder_path)
 
     # Build graph
     print("Building the graph...")
-    graph = build_graph(documents)
+    postings = build_graph(documents)
     print("Graph built successfully!")
 
+    # Write to a temporary file and rename it, so an interrupted run never leaves a truncated cache
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        pickle.dump((documents, postings), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+    return documents, postings
+
+# CLI Interface
+def main():
+    # Load documents and build the graph, or reuse them from an earlier run
+    folder_path = "json_documents/"  # Set the folder path here
+    documents, postings = load_index(folder_path)
+
     while True:
         print("\n---- Proximal Nodes Document Retrieval ----")
         print("1. Perform search query")
@@ -111,13 +181,12 @@ def main():
             terms_input = input("Enter terms of interest (space-separated): ").strip()
             terms_of_interest = terms_input.split()  # Split by spaces into individual terms
             terms_of_interest = [term.lower() for term in terms_of_interest]
-            connected_docs = retrieve_documents(terms_of_interest, graph, documents)
+            connected_docs = retrieve_documents(terms_of_interest, postings)
             
             print("\nConnected Documents:")
             if connected_docs:
-                for doc_id in sorted(connected_docs):
-                    doc_index = int(doc_id.split("_")[1])
-                    print(f"Document ID: {doc_id} - Content: {documents[doc_index][:100]}...")
+                for doc_id in connected_docs:
+                    print(f"Document ID: doc_{doc_id} - Content: {documents[doc_id][:100]}...")
             else:
                 print("No documents found for the specified proximal nodes.")
         